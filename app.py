@@ -29,26 +29,25 @@ def main():
     # Cria o cabeçalho fixo com título e KPIs
     # gui_components.create_header(df_filtered)
 
-    # Cria as abas principais da aplicação
-    tab_inicio, tab_geral, tab_agregacoes, tab_cruzada, tab_temporal = st.tabs([
-        "📊 Início", "📋 Tabela Geral", "📈 Agregações", "🔗 Análise Cruzada", "⏳ Série Temporal"
-    ])
+    # Cria a barra de abas; apenas a aba ativa é executada a cada rerun
+    # (cada aba é um fragment: interações dentro dela reexecutam somente a própria aba)
+    active_tab = gui_components.create_tab_selector()
 
-    with tab_inicio:
+    if active_tab == 'inicio':
         gui_components.display_home_tab()
 
-    with tab_geral:
+    elif active_tab == 'geral':
         # Passa o DF filtrado e as colunas selecionadas
         gui_components.display_general_table_tab(df_filtered)
 
-    with tab_agregacoes:
+    elif active_tab == 'agregacoes':
         # A aba de agregações opera sobre os dados já filtrados
         gui_components.display_aggregations_tab(df_filtered)
 
-    with tab_cruzada:
+    elif active_tab == 'cruzada':
         gui_components.display_crosstab_tab(df_filtered)
     
-    with tab_temporal:
+    elif active_tab == 'temporal':
         gui_components.display_timeseries_tab(df_filtered)
 
 if __name__ == "__main__":
@@ -1,14 +1,24 @@
-import os, json
+import os, re, json, warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from time import perf_counter
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from pandas.tseries.api import guess_datetime_format
 from rich import print
 from rich.panel import Panel
 from rich.table import Table
 
+from src.config import PARQUET_WRITE_OPTIONS, SOURCE_METADATA_KEY
+
 def timer_decorator(func):
     def wrapper_timer(*args, **kwargs):
         start_time = perf_counter()
@@ -20,13 +30,139 @@ def timer_decorator(func):
 
 # === 
 
+try:
+    import python_calamine  # noqa: F401 - leitor de planilhas em Rust, opcional
+    EXCEL_ENGINE: Optional[str] = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # Motor padrão do pandas (openpyxl)
+
+def _read_excel(file_path: str, **kwargs) -> pd.DataFrame:
+    """
+    Lê uma planilha Excel com o motor calamine quando disponível.
+
+    O openpyxl monta cada célula em Python, o que domina o tempo de leitura de
+    planilhas grandes; o calamine faz o parsing em código nativo.
+    """
+    return pd.read_excel(file_path, engine=EXCEL_ENGINE, **kwargs)
+
+CSV_BLOCK_SIZE = 32 << 20  # 32 MB por bloco processado em paralelo
+
+def _read_csv_multithread(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê um CSV com o leitor multithread do pyarrow, que divide o arquivo em blocos
+    processados em paralelo. Recorre ao pd.read_csv se o pyarrow não conseguir
+    inferir o schema do arquivo.
+    """
+    try:
+        table = pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE, use_threads=True),
+            convert_options=pa_csv.ConvertOptions(include_columns=columns),
+        )
+        return table.to_pandas(self_destruct=True)
+    except pa.ArrowInvalid:
+        return pd.read_csv(file_path, usecols=columns)
+
+@lru_cache(maxsize=16)
+def _read_parquet_metadata(file_path: str, mtime: float) -> pq.FileMetaData:
+    """Lê o rodapé (metadados) do Parquet uma única vez por versão do arquivo."""
+    return pq.read_metadata(file_path)
+
+def _parquet_column_names(file_path: str) -> List[str]:
+    """Retorna os nomes das colunas de um Parquet lendo apenas o rodapé do arquivo."""
+    metadata = _read_parquet_metadata(file_path, os.path.getmtime(file_path))
+    return metadata.schema.to_arrow_schema().names
+
+def _row_group_may_match(row_group: pq.RowGroupMetaData, column_index: int, op: str, value: Any) -> bool:
+    """
+    Indica se um row group pode conter linhas que satisfazem o filtro, com base
+    nas estatísticas min/max da coluna. Na dúvida, o row group é mantido.
+    """
+    stats = row_group.column(column_index).statistics
+    if stats is None or not stats.has_min_max:
+        return True
+    try:
+        if op in ("==", "="):
+            return stats.min <= value <= stats.max
+        if op == "in":
+            return any(stats.min <= v <= stats.max for v in value)
+        if op == "<":
+            return stats.min < value
+        if op == "<=":
+            return stats.min <= value
+        if op == ">":
+            return stats.max > value
+        if op == ">=":
+            return stats.max >= value
+    except TypeError:
+        pass  # Tipos não comparáveis com as estatísticas
+    return True
+
+def _select_row_groups(metadata: pq.FileMetaData, filters: Optional[List[Tuple]]) -> List[int]:
+    """
+    Retorna os índices dos row groups que podem satisfazer todos os filtros (AND).
+    Filtros em forma disjuntiva (lista de listas) não são podados.
+    """
+    all_groups = list(range(metadata.num_row_groups))
+    if not filters or any(isinstance(f, list) for f in filters):
+        return all_groups
+
+    column_positions = {metadata.schema.column(i).path: i for i in range(metadata.num_columns)}
+    selected = []
+    for i in all_groups:
+        row_group = metadata.row_group(i)
+        if all(
+            col not in column_positions or _row_group_may_match(row_group, column_positions[col], op, value)
+            for col, op, value in filters
+        ):
+            selected.append(i)
+    return selected
+
+def _read_parquet_table(
+    file_path: str, columns: Optional[List[str]] = None, filters: Optional[List[Tuple]] = None
+) -> pa.Table:
+    """
+    Lê um Parquet como tabela Arrow, decodificando apenas as colunas pedidas e os
+    row groups cujas estatísticas podem satisfazer os filtros. As leituras de
+    colunas adjacentes são agrupadas (pre_buffer) e feitas em paralelo. O arquivo
+    é mapeado em memória, evitando a cópia dos bytes comprimidos para um buffer.
+    """
+    metadata = _read_parquet_metadata(file_path, os.path.getmtime(file_path))
+    parquet_file = pq.ParquetFile(file_path, metadata=metadata, pre_buffer=True, memory_map=True)
+
+    # As colunas usadas nos filtros precisam ser lidas, mesmo que não tenham sido pedidas
+    predicates = [p for f in filters for p in (f if isinstance(f, list) else [f])] if filters else []
+    filter_columns = dict.fromkeys(col for col, _, _ in predicates)
+    extra_columns = [] if columns is None else [c for c in filter_columns if c not in columns]
+    read_columns = None if columns is None else list(columns) + extra_columns
+
+    table = parquet_file.read_row_groups(
+        _select_row_groups(metadata, filters),
+        columns=read_columns,
+        use_threads=True,
+        use_pandas_metadata=True,
+    )
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if extra_columns:
+        table = table.drop_columns(extra_columns)
+    return table
+
 @timer_decorator
-def read_dataframe(file_path: Optional[str] = None) -> Optional[pd.DataFrame]:
+def read_dataframe(
+    file_path: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[Tuple]] = None,
+) -> Optional[pd.DataFrame]:
     """
     Lê um arquivo de dados em vários formatos e retorna um DataFrame do pandas.
 
     Args:
         file_path (str, optional): Caminho do arquivo. Se None, solicita input do usuário.
+        columns (List[str], optional): Colunas a serem lidas. Se None, lê todas.
+            Em arquivos Parquet, apenas as colunas pedidas são decodificadas.
+        filters (List[Tuple], optional): Filtros de linha no formato do pyarrow
+            (ex: [('Situação', '==', 'Em Andamento')]). Aplicável somente a Parquet.
 
     Returns:
         pd.DataFrame: DataFrame contendo os dados do arquivo ou None se houver erro
@@ -43,13 +179,18 @@ def read_dataframe(file_path: Optional[str] = None) -> Optional[pd.DataFrame]:
     try:
         df = None
         if file_extension == ".parquet":
-            df = pd.read_parquet(file_path)
+            table = _read_parquet_table(file_path, columns, filters)
+            # self_destruct libera os buffers do Arrow durante a conversão, evitando pico de memória
+            df = table.to_pandas(self_destruct=True)
+            del table
         elif file_extension in (".pkl", ".pck") or file_extension == ".pickle":
             df = pd.read_pickle(file_path)
+            if columns is not None:
+                df = df[columns]
         elif file_extension == ".csv":
-            df = pd.read_csv(file_path)
+            df = _read_csv_multithread(file_path, columns)
         elif file_extension == ".xlsx":
-            df = pd.read_excel(file_path)
+            df = _read_excel(file_path, usecols=columns)
         else:
             print(f"[yellow]Formato de arquivo não suportado: {file_extension}[/yellow]")
             print("[yellow]Formatos suportados: .parquet, .pkl, .pickle, .csv, .xlsx[/yellow]")
@@ -61,94 +202,301 @@ def read_dataframe(file_path: Optional[str] = None) -> Optional[pd.DataFrame]:
         print(f"[red]Erro ao ler o arquivo: {str(e)}[/red]")
         return None
     
-def sanitize_for_streamlit(df: pd.DataFrame) -> pd.DataFrame:
+CONTAINER_TYPES = (dict, list, tuple, set, frozenset)
+
+def _json_dumps_safe(x: Any) -> str:
+    """Serializa um valor complexo em JSON, recorrendo a str() em caso de falha."""
+    try:
+        return json.dumps(x, default=str)
+    except (TypeError, ValueError):
+        return str(x)
+
+def _sanitize_object_series(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna 'object' em strings de forma vetorizada.
+
+    Os valores escalares são convertidos de uma só vez com astype(str); apenas as
+    células que contêm listas, dicts, tuplas ou sets passam pelo json.dumps.
+    Valores nulos viram None.
+    """
+    null_mask = series.isna().to_numpy()
+
+    # Caso mais comum: a coluna já contém apenas strings (verificação feita em C)
+    if pd.api.types.infer_dtype(series, skipna=True) == "string":
+        if not null_mask.any():
+            return series
+        result = series.to_numpy(dtype=object, copy=True)
+        result[null_mask] = None
+        return pd.Series(result, index=series.index, name=series.name)
+
+    values = series.to_numpy(dtype=object)
+    # isinstance também reconhece subclasses (OrderedDict, namedtuple, ...)
+    container_mask = np.fromiter((isinstance(x, CONTAINER_TYPES) for x in values),
+                                 dtype=bool, count=len(values))
+
+    result = series.astype(str).to_numpy(dtype=object)
+    if container_mask.any():
+        result[container_mask] = [_json_dumps_safe(x) for x in values[container_mask]]
+    result[null_mask] = None
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+def sanitize_for_streamlit(df: pd.DataFrame, copy: bool = False) -> pd.DataFrame:
     """
     Usar essa função somente se o dataframe estiver apresentando problemas de compatibilidade com Streamlit.
 
     Higieniza um DataFrame para exibição segura no Streamlit.
     1. Reseta o índice para evitar erros de serialização do índice.
     2. Converte colunas 'object' com tipos complexos (listas, dicts) para strings JSON.
+
+    Por padrão o resultado compartilha com o original as colunas não alteradas
+    (o original nunca é modificado); use copy=True para obter uma cópia independente.
     """
-    df_sanitized = df.copy()
+    object_cols = df.select_dtypes(include=['object']).columns
+    needs_reset = not isinstance(df.index, pd.RangeIndex)
+
+    # Nada a higienizar: evita a cópia do DataFrame.
+    if not needs_reset and object_cols.empty:
+        return df
+
+    # Cópia rasa: as colunas higienizadas são substituídas, não alteradas no lugar
+    df_sanitized = df.copy(deep=copy)
 
     # Etapa 1: Resetar o índice APENAS se não for um RangeIndex padrão.
     # Isso corrige o problema do .describe() sem afetar outros dataframes.
-    if not isinstance(df_sanitized.index, pd.RangeIndex):
-        df_sanitized = df_sanitized.reset_index()
+    if needs_reset:
+        df_sanitized.reset_index(inplace=True)
 
     # Etapa 2: Higienizar colunas de objeto.
-    for col in df_sanitized.select_dtypes(include=['object']).columns:
-        # Define uma função de conversão segura para aplicar a cada célula.
-        def safe_converter(x):
-            if isinstance(x, (dict, list, tuple, set)):
-                try:
-                    return json.dumps(x, default=str)
-                except (TypeError, ValueError):
-                    return str(x)
-            return str(x) if pd.notna(x) else None
-
-        df_sanitized[col] = df_sanitized[col].apply(safe_converter)
-    
+    for col in object_cols:
+        df_sanitized[col] = _sanitize_object_series(df_sanitized[col])
+
     return df_sanitized
 
-def detect_column_types(df: pd.DataFrame) -> Dict[str, Dict]:
+def _count_uniques(df: pd.DataFrame) -> pd.Series:
+    """
+    Conta os valores únicos de todas as colunas com uma única chamada ao nunique().
+
+    Colunas com tipos não "hashable" (como listas/arrays) quebram o .nunique();
+    nesse caso a contagem é refeita coluna a coluna e essas colunas recebem -1.
+    """
+    try:
+        return df.nunique()
+    except TypeError:
+        counts = {}
+        for col in df.columns:
+            try:
+                counts[col] = df[col].nunique()
+            except TypeError:
+                counts[col] = -1  # Indica que a contagem de únicos não é aplicável
+        return pd.Series(counts, dtype="int64")
+
+MAX_WORKERS = os.cpu_count() or 1  # Threads para as análises feitas coluna a coluna
+NUMERIC_SAMPLE_SIZE = 10_000  # Máximo de valores testados na conversão numérica
+DATETIME_SAMPLE_SIZE = 100  # Máximo de valores testados na conversão datetime
+SAMPLE_SECTION_SIZE = NUMERIC_SAMPLE_SIZE // 3  # Linhas do início, do meio (aleatórias) e do fim usadas na inferência
+DATE_PATTERN = re.compile(r'^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}')
+DATETIME_MIN_SUCCESS = 0.9  # Fração mínima da amostra que precisa ser data válida
+CATEGORY_MAX_UNIQUE_RATIO = 0.05  # Proporção máxima de valores distintos para sugerir 'category'
+
+def _guess_datetime_format(series: pd.Series) -> str:
+    """
+    Infere o formato de data de uma coluna de texto a partir de uma amostra.
+
+    Passar o formato ao pd.to_datetime evita a inferência linha a linha do pandas.
+    Se nenhum formato único servir para a amostra, retorna "mixed".
+    """
+    non_null = series.dropna()
+    if non_null.empty:
+        return "mixed"
+
+    sample = non_null.sample(min(DATETIME_SAMPLE_SIZE, len(non_null)), random_state=0).astype(str)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # Aviso de dayfirst em datas ISO
+        date_format = guess_datetime_format(sample.iloc[0], dayfirst=True)
+    if date_format is None or (
+        pd.to_datetime(sample, format=date_format, errors="coerce").notna().mean() <= DATETIME_MIN_SUCCESS
+    ):
+        return "mixed"
+    return date_format
+
+# Texto aceito pelo pd.to_numeric: inteiros, decimais, notação científica e infinito
+NUMERIC_TEXT_PATTERN = r'(?i)^\s*[-+]?(?:(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?|inf(?:inity)?)\s*$'
+
+def _is_numeric_text(values: np.ndarray) -> np.ndarray:
+    """
+    Indica quais valores de um array 'object' podem ser convertidos em número.
+
+    Se todos forem strings, o teste é uma expressão regular avaliada pelo Arrow em C++,
+    sem a conversão linha a linha; caso contrário recorre ao pd.to_numeric.
+    """
+    if pd.api.types.infer_dtype(values, skipna=False) == "string":
+        matches = pc.match_substring_regex(pa.array(values, type=pa.string()), NUMERIC_TEXT_PATTERN)
+        return matches.to_numpy(zero_copy_only=False)
+    return pd.to_numeric(pd.Series(values), errors="coerce").notna().to_numpy()
+
+def _sample_positions(n_rows: int) -> np.ndarray:
+    """
+    Posições (ordenadas) das linhas usadas na inferência de tipos: as primeiras e as
+    últimas SAMPLE_SECTION_SIZE linhas mais uma amostra aleatória do meio.
+
+    Arquivos costumam vir ordenados (por data, por situação...), então olhar só o
+    início da coluna pode esconder valores de outro formato que aparecem adiante.
+    """
+    if n_rows <= 3 * SAMPLE_SECTION_SIZE:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(0)
+    middle = rng.choice(
+        np.arange(SAMPLE_SECTION_SIZE, n_rows - SAMPLE_SECTION_SIZE), SAMPLE_SECTION_SIZE, replace=False
+    )
+    middle.sort()
+    return np.concatenate((
+        np.arange(SAMPLE_SECTION_SIZE), middle, np.arange(n_rows - SAMPLE_SECTION_SIZE, n_rows)
+    ))
+
+def _numeric_success_rates(df: pd.DataFrame, columns: List[str]) -> Dict[str, float]:
+    """
+    Estima, para várias colunas de texto de uma vez, o percentual de valores não-nulos
+    convertíveis em número.
+
+    As amostras de todas as colunas são concatenadas e fatoradas, de modo que o
+    pd.to_numeric roda uma única vez e apenas sobre os valores distintos (colunas
+    de texto repetem muito os mesmos valores); os acertos são somados por coluna a
+    partir dos deslocamentos. Se algum valor impedir a conversão em lote (ex: listas),
+    cada coluna é testada separadamente e as que falharem ficam de fora do resultado.
+    """
+    sampled_rows = df.iloc[_sample_positions(len(df))]
+    samples = {}
+    for col in columns:
+        # Os não-nulos da amostra de linhas bastam; só varre a coluna inteira se não houver nenhum
+        sample = sampled_rows[col].dropna()
+        if sample.empty:
+            sample = df[col].dropna().head(NUMERIC_SAMPLE_SIZE)
+        if len(sample) > 0:
+            samples[col] = sample
+    if not samples:
+        return {}
+
+    try:
+        flat = np.concatenate([sample.to_numpy(dtype=object) for sample in samples.values()])
+        codes, uniques = pd.factorize(flat)
+        converted = _is_numeric_text(uniques)[codes]
+    except (TypeError, ValueError):
+        rates = {}
+        for col, sample in samples.items():
+            try:
+                rates[col] = pd.to_numeric(sample, errors="coerce").notna().mean() * 100
+            except (TypeError, ValueError):
+                pass
+        return rates
+
+    lengths = np.fromiter((len(sample) for sample in samples.values()), dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    successes = np.add.reduceat(converted, offsets)
+    return dict(zip(samples, successes / lengths * 100))
+
+def column_summary(df: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Calcula uma única vez as estatísticas por coluna usadas pelas funções de diagnóstico.
+
+    Cada estatística é obtida com uma chamada vetorizada sobre o DataFrame inteiro.
+    O resultado pode ser repassado (parâmetro `summary`) a detect_column_types,
+    create_info_dataframe e print_dataframe_info quando forem usadas em conjunto.
+
+    Returns:
+        Dict[str, pd.Series]: 'nulls' (valores nulos), 'nuniq' (valores únicos, -1 se
+        não aplicável) e 'dtype' (tipo de cada coluna), todos indexados pela coluna.
+    """
+    return {'nulls': df.isna().sum(), 'nuniq': _count_uniques(df), 'dtype': df.dtypes}
+
+def detect_column_types(df: pd.DataFrame, summary: Optional[Dict[str, pd.Series]] = None) -> Dict[str, Dict]:
     """
     Detecta possíveis tipos para cada coluna e fornece estatísticas.
 
     Args:
         df (pd.DataFrame): DataFrame para análise
+        summary (Dict, optional): Resultado de column_summary(df), se já calculado
 
     Returns:
         Dict: Informações sobre cada coluna
     """
-    column_info = {}
+    if summary is None:
+        summary = column_summary(df)
+    n_rows = len(df)
+    dtypes = summary['dtype'].astype(str).to_dict()
+    null_counts = summary['nulls'].to_dict()
+    unique_counts = summary['nuniq'].to_dict()
 
-    for col in df.columns:
-        # Lida com tipos não "hashable" (como listas/arrays) que quebram o .nunique()
-        try:
-            unique_count = df[col].nunique()
-        except TypeError:
-            unique_count = -1  # Indica que a contagem de únicos não é aplicável
+    # Colunas de texto têm o teste numérico feito em lote, em uma única passada
+    text_columns = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+    numeric_rates = _numeric_success_rates(df, text_columns)
+
+    def _probe_column(col: str, series: pd.Series) -> Tuple[str, Dict]:
+        null_count = null_counts[col]
 
         info = {
-            "original_dtype": str(df[col].dtype),
-            "null_count": df[col].isna().sum(),
-            "null_percent": (df[col].isna().sum() / len(df)) * 100,
-            "unique_count": unique_count,
+            "original_dtype": dtypes[col],
+            "null_count": null_count,
+            "null_percent": (null_count / n_rows) * 100 if n_rows > 0 else 0,
+            "unique_count": unique_counts[col],
             "sample_values": [],
             "can_be_numeric": False,
             "can_be_datetime": False,
+            "can_be_category": False,
             "numeric_success_rate": 0,
             "datetime_success_rate": 0,
         }
 
+        # Texto com poucos valores distintos se beneficia do tipo 'category'
+        if col in text_columns and n_rows > 0:
+            info["can_be_category"] = 0 <= unique_counts[col] / n_rows < CATEGORY_MAX_UNIQUE_RATIO
+
         # Pegar amostra de valores não-nulos
-        non_null_values = df[col].dropna()
-        if len(non_null_values) > 0:
-            sample_size = min(5, len(non_null_values))
-            info["sample_values"] = [
-                str(x) for x in non_null_values.head(sample_size).tolist()
-            ]
+        # (sem nulos, a própria coluna serve e o dropna é evitado)
+        non_null_values = series if null_count == 0 else series.dropna()
+        n_non_null = n_rows - null_count
+        if n_non_null > 0:
+            info["sample_values"] = non_null_values.head(5).astype(str).tolist()
 
         # Testar conversão numérica
-        if len(non_null_values) > 0:
+        if n_non_null > 0 and pd.api.types.is_numeric_dtype(non_null_values):
+            # Coluna já numérica: a conversão sempre teria sucesso
+            info["numeric_success_rate"] = 100.0
+            info["can_be_numeric"] = True
+        elif col in numeric_rates:
+            info["numeric_success_rate"] = numeric_rates[col]
+            info["can_be_numeric"] = info["numeric_success_rate"] > 70  # 70% de sucesso
+        elif n_non_null > 0 and col not in text_columns:
             try:
-                numeric_converted = pd.to_numeric(non_null_values, errors="coerce")
+                # Uma amostra (início, meio e fim da coluna) basta para estimar a taxa de sucesso
+                sample_for_numeric = series.iloc[_sample_positions(n_rows)].dropna()
+                if sample_for_numeric.empty:
+                    sample_for_numeric = non_null_values.head(NUMERIC_SAMPLE_SIZE)
+                numeric_converted = pd.to_numeric(sample_for_numeric, errors="coerce")
                 numeric_success = numeric_converted.notna().sum()
                 info["numeric_success_rate"] = (
-                    numeric_success / len(non_null_values)
+                    numeric_success / len(sample_for_numeric)
                 ) * 100
                 info["can_be_numeric"] = info["numeric_success_rate"] > 70  # 70% de sucesso
             except:
                 pass
 
         # Testar conversão datetime (apenas se não for muito numérica)
-        if len(non_null_values) > 0 and info["numeric_success_rate"] < 50:
+        if n_non_null > 0 and info["numeric_success_rate"] < 50:
             try:
-                # Tentar apenas uma amostra para evitar warnings excessivos
-                sample_for_date = non_null_values.head(min(100, len(non_null_values)))
-                datetime_converted = pd.to_datetime(sample_for_date, errors="coerce")
-                datetime_success = datetime_converted.notna().sum()
+                # Tentar apenas uma amostra aleatória (o início da coluna pode estar ordenado)
+                sample_for_date = non_null_values.sample(
+                    min(DATETIME_SAMPLE_SIZE, n_non_null), random_state=0
+                )
+                # Pré-filtro barato: só valores com cara de data seguem para o parser
+                looks_like_date = sample_for_date.astype(str).str.match(DATE_PATTERN).to_numpy()
+                if looks_like_date.mean() > 0.3:
+                    datetime_converted = pd.to_datetime(
+                        sample_for_date[looks_like_date], format="mixed", dayfirst=True, errors="coerce"
+                    )
+                    datetime_success = datetime_converted.notna().sum()
+                else:
+                    datetime_success = 0
                 info["datetime_success_rate"] = (
                     datetime_success / len(sample_for_date)
                 ) * 100
@@ -158,12 +506,108 @@ def detect_column_types(df: pd.DataFrame) -> Dict[str, Dict]:
             except:
                 pass
 
-        column_info[col] = info
+        return col, info
+
+    # As colunas são independentes; parte do trabalho dos kernels do pandas/NumPy libera o GIL
+    # (as Series são extraídas aqui, fora das threads, e apenas lidas por elas)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        column_info = dict(executor.map(_probe_column, df.columns, [df[col] for col in df.columns]))
 
     return column_info
 
+def _to_string_series(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna em strings, com nulos como "".
+
+    O cast para string do Arrow converte todos os elementos (inclusive listas) em C++;
+    a conversão elemento a elemento com str() fica apenas como último recurso.
+    """
+    try:
+        return series.astype("string[pyarrow]").fillna("")
+    except Exception:
+        return series.fillna("").apply(str)
+
+# Conversão inteligente para boolean (comparação sem diferenciar maiúsculas)
+BOOLEAN_VALUES = {
+    "true": True,
+    "false": False,
+    "1": True,
+    "0": False,
+    "yes": True,
+    "no": False,
+    "sim": True,
+    "nao": False,
+}
+
+def _to_boolean_values(series: pd.Series) -> np.ndarray:
+    """
+    Converte uma coluna em um array 'object' de bools (None onde o valor não é reconhecido).
+
+    Minúsculas e busca no mapa rodam nos kernels do Arrow, em uma única passada.
+    Em colunas 'category' apenas as categorias são convertidas; o resultado é
+    expandido pelos códigos, sem materializar uma string por linha.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        mapped_categories = _to_boolean_values(pd.Series(series.cat.categories))
+        # O código -1 (nulo) aponta para o None anexado ao final
+        return np.append(mapped_categories, None)[series.cat.codes.to_numpy()]
+
+    lowered = pc.utf8_lower(pa.array(series.astype("string[pyarrow]")))
+    idx = pc.index_in(lowered, value_set=pa.array(list(BOOLEAN_VALUES)))
+    mapped = pc.take(pa.array(list(BOOLEAN_VALUES.values()), type=pa.bool_()), idx)
+    return mapped.to_numpy(zero_copy_only=False).astype(object)
+
+def _arrow_chunks(series: pd.Series) -> Optional[pa.ChunkedArray]:
+    """Retorna os buffers Arrow de uma coluna pd.ArrowDtype (sem cópia) ou None para as demais."""
+    if isinstance(series.dtype, pd.ArrowDtype):
+        return series.array.__arrow_array__()  # Protocolo de exportação do pandas; mantém os chunks
+    return None
+
+def _wrap_arrow(values: pa.ChunkedArray, like: pd.Series) -> pd.Series:
+    """Monta uma Series pd.ArrowDtype com o índice e o nome de `like`."""
+    return pd.Series(pd.arrays.ArrowExtensionArray(values), index=like.index, name=like.name)
+
+def _arrow_to_numeric(series: pd.Series) -> Optional[pd.Series]:
+    """
+    Conversão numérica feita direto nos buffers Arrow de colunas pd.ArrowDtype.
+
+    Textos que não são números viram nulos (como errors="coerce"), e o resultado
+    continua Arrow, sem passar por arrays 'object'. Retorna None quando a coluna
+    não é Arrow ou não é texto, para que o pd.to_numeric seja usado.
+    """
+    values = _arrow_chunks(series)
+    if values is None:
+        return None
+    if pa.types.is_integer(values.type) or pa.types.is_floating(values.type):
+        return series
+    if not (pa.types.is_string(values.type) or pa.types.is_large_string(values.type)):
+        return None
+    is_number = pc.match_substring_regex(values, NUMERIC_TEXT_PATTERN)
+    cleaned = pc.if_else(is_number, pc.utf8_trim_whitespace(values), pa.scalar(None, values.type))
+    return _wrap_arrow(pc.cast(cleaned, pa.float64()), series)
+
+def _arrow_to_datetime(series: pd.Series, date_format: str) -> Optional[pd.Series]:
+    """
+    Conversão para data feita com o strptime do Arrow em colunas pd.ArrowDtype de texto.
+
+    Só se aplica com um formato único; valores fora do formato viram nulos. Retorna
+    None (e o pd.to_datetime é usado) para outras colunas, para format="mixed" ou
+    se o Arrow não suportar o formato.
+    """
+    values = _arrow_chunks(series)
+    if values is None or date_format == "mixed" or not pa.types.is_string(values.type):
+        return None
+    try:
+        parsed = pc.strptime(values, format=date_format, unit="ns", error_is_null=True)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return _wrap_arrow(parsed, series)
+
 def apply_column_types(
-    df: pd.DataFrame, type_mapping: Dict[str, str]
+    df: pd.DataFrame,
+    type_mapping: Dict[str, str],
+    copy: bool = False,
+    datetime_formats: Optional[Dict[str, str]] = None,
 ) -> Tuple[pd.DataFrame, List[str]]:
     """
     Aplica os tipos de dados especificados pelo usuário.
@@ -171,31 +615,59 @@ def apply_column_types(
     Args:
         df (pd.DataFrame): DataFrame original
         type_mapping (Dict[str, str]): Mapeamento coluna -> tipo desejado
+        copy (bool): Se True, devolve uma cópia independente; caso contrário as
+            colunas não convertidas são compartilhadas com o original
+        datetime_formats (Dict[str, str], optional): Formato explícito (ex: '%d/%m/%Y')
+            das colunas 'datetime'; nas demais o formato é inferido de uma amostra
 
     Returns:
         Tuple[pd.DataFrame, List[str]]: DataFrame com tipos aplicados e log de conversão
     """
-    df_typed = df.copy()
+    # Cópia rasa: cada conversão substitui a coluna inteira, sem alterar o original
+    df_typed = df.copy(deep=copy)
 
-    # Reset do índice para evitar problemas
-    df_typed = df_typed.reset_index(drop=True)
+    # Reset do índice para evitar problemas (apenas se não for o índice padrão 0..n-1)
+    if not df_typed.index.equals(pd.RangeIndex(len(df_typed))):
+        df_typed.reset_index(drop=True, inplace=True)
 
     conversion_log = []
 
+    # As colunas 'string' são convertidas juntas, em uma única chamada; se alguma
+    # falhar, todas seguem pelo laço abaixo, com o tratamento de erro por coluna
+    string_cols = [col for col, t in type_mapping.items() if t == "string" and col in df_typed.columns]
+    bulk_converted = set()
+    if string_cols:
+        try:
+            df_typed[string_cols] = df_typed[string_cols].astype("string[pyarrow]").fillna("")
+            bulk_converted = set(string_cols)
+        except Exception:
+            pass
+
     for col, target_type in type_mapping.items():
         if col not in df_typed.columns:
             continue
 
+        if col in bulk_converted:
+            conversion_log.append(f"✅ {col}: convertido para string")
+            continue
+
         try:
             original_nulls = df_typed[col].isna().sum()
 
             if target_type == "string":
-                # Usar .apply(str) é mais robusto para garantir que todos os elementos virem strings
-                df_typed[col] = df_typed[col].fillna("").apply(str)
+                df_typed[col] = _to_string_series(df_typed[col])
                 conversion_log.append(f"✅ {col}: convertido para string")
 
+            elif target_type == "category":
+                # Poucos valores distintos: códigos inteiros em memória e dicionário no Parquet
+                df_typed[col] = _to_string_series(df_typed[col]).astype("category")
+                conversion_log.append(f"✅ {col}: convertido para category")
+
             elif target_type == "numeric":
-                df_typed[col] = pd.to_numeric(df_typed[col], errors="coerce")
+                converted = _arrow_to_numeric(df_typed[col])
+                if converted is None:
+                    converted = pd.to_numeric(df_typed[col], errors="coerce")
+                df_typed[col] = converted
                 new_nulls = df_typed[col].isna().sum()
                 lost_values = new_nulls - original_nulls
                 if lost_values > 0:
@@ -206,7 +678,15 @@ def apply_column_types(
                     conversion_log.append(f"✅ {col}: convertido para numérico")
 
             elif target_type == "datetime":
-                df_typed[col] = pd.to_datetime(df_typed[col], errors="coerce")
+                if not pd.api.types.is_datetime64_any_dtype(df_typed[col]):
+                    # Com o formato definido, o pandas não infere o formato linha a linha
+                    date_format = (datetime_formats or {}).get(col) or _guess_datetime_format(df_typed[col])
+                    converted = _arrow_to_datetime(df_typed[col], date_format)
+                    if converted is None:
+                        converted = pd.to_datetime(
+                            df_typed[col], format=date_format, dayfirst=True, errors="coerce", cache=True
+                        )
+                    df_typed[col] = converted
                 new_nulls = df_typed[col].isna().sum()
                 lost_values = new_nulls - original_nulls
                 if lost_values > 0:
@@ -217,86 +697,104 @@ def apply_column_types(
                     conversion_log.append(f"✅ {col}: convertido para datetime")
 
             elif target_type == "boolean":
-                # Tentar conversão inteligente para boolean
-                bool_map = {
-                    "true": True,
-                    "false": False,
-                    "1": True,
-                    "0": False,
-                    "yes": True,
-                    "no": False,
-                    "sim": True,
-                    "nao": False,
-                }
                 # O tipo 'boolean' do pandas pode causar problemas; converter para 'object' com bools
-                series_lower = df_typed[col].astype(str).str.lower()
-                df_typed[col] = series_lower.map(bool_map)
+                df_typed[col] = pd.Series(_to_boolean_values(df_typed[col]), index=df_typed.index, dtype=object)
                 conversion_log.append(f"✅ {col}: convertido para boolean")
 
         except Exception as e:
             # Em caso de erro, manter como string compatível
-            df_typed[col] = df_typed[col].fillna("").apply(str)
+            df_typed[col] = _to_string_series(df_typed[col])
             conversion_log.append(
                 f"❌ {col}: erro na conversão, mantido como string - {str(e)}"
             )
 
     return df_typed, conversion_log
 
-def print_dataframe_info(df: pd.DataFrame) -> None:
+def _dataframe_nbytes(df: pd.DataFrame) -> int:
     """
-    Imprime informações detalhadas sobre o DataFrame usando rich.
+    Estima a memória ocupada pelos dados do DataFrame sem percorrer todas as células.
 
-    Args:
-        df (pd.DataFrame): DataFrame para análise
+    Colunas numéricas, datas, 'category' e texto em Arrow já têm o tamanho exato no
+    memory_usage() raso. Só as colunas 'object' precisam do deep=True (que mede cada
+    objeto Python); nelas ele é aplicado a uma amostra de linhas e extrapolado.
     """
-    info_text = f"""
-    [bold cyan]Informações do DataFrame:[/bold cyan]
-    • Dimensões (linhas, colunas): {df.shape}
-    • Total de elementos: {df.size}
-    • Memória utilizada: {df.memory_usage().sum() / 1024**2:.2f} MB
+    usage = df.memory_usage(index=False, deep=False)
+    object_cols = df.select_dtypes(include=['object']).columns
+    if object_cols.empty or df.empty:
+        return int(usage.sum())
+    positions = _sample_positions(len(df))
+    sample_usage = df[object_cols].iloc[positions].memory_usage(index=False, deep=True).sum()
+    return int(usage.drop(object_cols).sum() + sample_usage * len(df) / len(positions))
+
+@lru_cache(maxsize=16)
+def _build_info_table(n_rows: int, columns: Tuple[str, ...], dtypes: Tuple[str, ...],
+                      null_counts: Tuple[int, ...], nunique_counts: Tuple[int, ...]) -> Table:
     """
-    print(Panel(info_text, title="DataFrame Info", border_style="cyan"))
+    Monta a tabela rich de detalhes das colunas.
 
+    Recebe apenas tuplas (hashable), de modo que chamadas repetidas sobre o mesmo
+    DataFrame reaproveitam a tabela já construída.
+    """
     table = Table(title="Detalhes das Colunas")
     table.add_column("Nome da Coluna", style="cyan")
     table.add_column("Tipo de Dado", style="magenta")
     table.add_column("Valores Nulos", style="yellow")
     table.add_column("Valores Únicos", style="green")
 
-    for col in df.columns:
-        n_unique = df[col].nunique()
-        null_count = df[col].isna().sum()
-        null_percent = (null_count / len(df)) * 100 if len(df) > 0 else 0
+    for col, dtype, null_count, n_unique in zip(columns, dtypes, null_counts, nunique_counts):
+        null_percent = (null_count / n_rows) * 100 if n_rows > 0 else 0
+        table.add_row(col, dtype, f"{null_count} ({null_percent:.1f}%)", str(n_unique))
 
-        table.add_row(
-            str(col),
-            str(df[col].dtype),
-            f"{null_count} ({null_percent:.1f}%)",
-            str(n_unique),
-        )
+    return table
+
+def print_dataframe_info(df: pd.DataFrame, summary: Optional[Dict[str, pd.Series]] = None) -> None:
+    """
+    Imprime informações detalhadas sobre o DataFrame usando rich.
 
+    Args:
+        df (pd.DataFrame): DataFrame para análise
+        summary (Dict, optional): Resultado de column_summary(df), se já calculado
+    """
+    if summary is None:
+        summary = column_summary(df)
+
+    info_text = f"""
+    [bold cyan]Informações do DataFrame:[/bold cyan]
+    • Dimensões (linhas, colunas): {df.shape}
+    • Total de elementos: {df.size}
+    • Memória utilizada: {_dataframe_nbytes(df) / 1024**2:.2f} MB
+    """
+    print(Panel(info_text, title="DataFrame Info", border_style="cyan"))
+
+    table = _build_info_table(
+        len(df),
+        tuple(map(str, df.columns)),
+        tuple(map(str, summary['dtype'])),
+        tuple(summary['nulls'].tolist()),
+        tuple(summary['nuniq'].tolist()),
+    )
     print(table)
 
-def create_info_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def create_info_dataframe(df: pd.DataFrame, summary: Optional[Dict[str, pd.Series]] = None) -> pd.DataFrame:
     """
     Cria um DataFrame com informações sobre as colunas que é compatível com Streamlit.
+    Aceita o resultado de column_summary(df) para não recalcular as estatísticas.
     """
-    info_data = []
-    for col in df.columns:
-        null_count = df[col].isna().sum()
-        null_percent = (null_count / len(df)) * 100 if len(df) > 0 else 0
-        unique_count = df[col].nunique()
-
-        info_data.append(
-            {
-                "Coluna": str(col),
-                "Tipo": str(df[col].dtype),
-                "Valores Nulos": f"{null_count} ({null_percent:.1f}%)",
-                "Valores Únicos": unique_count,
-            }
-        )
-
-    return pd.DataFrame(info_data)
+    if summary is None:
+        summary = column_summary(df)
+    n_rows = len(df)
+    null_counts = summary['nulls']
+    null_percent = null_counts / n_rows * 100 if n_rows > 0 else null_counts * 0.0
+
+    # Montado coluna a coluna a partir das Series do resumo, sem um dict por linha
+    return pd.DataFrame({
+        "Coluna": summary['dtype'].index.map(str),
+        "Tipo": summary['dtype'].astype(str).to_numpy(),
+        "Valores Nulos": (null_counts.astype(str) + " (" + null_percent.map("{:.1f}".format) + "%)").to_numpy(),
+        "Valores Únicos": summary['nuniq'].to_numpy(),
+    })
+
+PROBLEMATIC_ARROW_TYPES = (list, dict, tuple, set)
 
 def diagnose_object_columns(df: pd.DataFrame, verbose: bool = True) -> Dict[str, Dict[str, Any]]:
     """Diagnostica tipos problemáticos em colunas object"""
@@ -304,25 +802,27 @@ def diagnose_object_columns(df: pd.DataFrame, verbose: bool = True) -> Dict[str,
     diagnosis = {}
 
     for col in object_cols:
-        type_counts = {}
         problematic_counts = {}
         samples = {}
 
-        # Usar .apply() é mais seguro para tipos mistos
-        unique_types = df[col].dropna().apply(lambda x: type(x).__name__).value_counts()
-        type_counts = unique_types.to_dict()
+        # np.frompyfunc obtém o tipo de cada célula em um laço em C, seguro para tipos mistos
+        non_null_values = df[col].dropna()
+        values = non_null_values.to_numpy(dtype=object, copy=False)
+        cell_types = np.frompyfunc(type, 1, 1)(values)
+        unique_types = pd.Series(cell_types, dtype=object).value_counts()
+        type_counts = {t.__name__: count for t, count in unique_types.items()}
 
         # Identifica tipos problemáticos para Arrow
-        problematic_types = [t for t in type_counts if t in ['list', 'dict', 'tuple', 'set']]
-        if problematic_types:
-            for pt in problematic_types:
-                problematic_counts[pt] = type_counts[pt]
-                try:
-                    # Encontra a primeira ocorrência do tipo problemático
-                    first_occurrence = df[col].dropna().apply(lambda x: isinstance(x, eval(pt))).idxmax()
-                    samples[pt] = {'index': first_occurrence, 'value': df.at[first_occurrence, col]}
-                except:
-                    samples[pt] = {'index': 'N/A', 'value': 'Could not retrieve sample'}
+        for pt in unique_types.index:
+            if pt not in PROBLEMATIC_ARROW_TYPES:
+                continue
+            problematic_counts[pt.__name__] = type_counts[pt.__name__]
+            try:
+                # Encontra a primeira ocorrência do tipo problemático no mesmo array já percorrido
+                position = np.argmax(cell_types == pt)
+                samples[pt.__name__] = {'index': non_null_values.index[position], 'value': values[position]}
+            except:
+                samples[pt.__name__] = {'index': 'N/A', 'value': 'Could not retrieve sample'}
 
         diagnosis[col] = {
             'unique_types': type_counts,
@@ -335,6 +835,108 @@ def diagnose_object_columns(df: pd.DataFrame, verbose: bool = True) -> Dict[str,
 
 # === Outras funções utilitárias ===
 
+def _to_datetime_if_dates(series: pd.Series) -> Optional[pd.Series]:
+    """
+    Converte a série para datetime somente se uma amostra indicar que ela contém datas.
+
+    O teste é feito em poucos valores; a conversão completa usa o formato inferido
+    da amostra, evitando a inferência linha a linha do pandas. Usar `errors='coerce'`
+    transforma valores inválidos em NaT. Retorna None se a coluna não for de datas.
+    """
+    non_null = series.dropna()
+    if non_null.empty:
+        return None
+
+    sample = non_null.sample(min(DATETIME_SAMPLE_SIZE, len(non_null)), random_state=0).astype(str)
+    parsed = pd.to_datetime(sample, format="mixed", dayfirst=True, errors="coerce")
+    if parsed.notna().mean() <= DATETIME_MIN_SUCCESS:
+        return None
+
+    date_format = _guess_datetime_format(non_null)
+    return pd.to_datetime(series, format=date_format, dayfirst=True, errors="coerce")
+
+@contextmanager
+def _atomic_output(output_path: str):
+    """
+    Fornece um caminho temporário para a escrita e só o move para output_path
+    quando ela termina sem erros. Em caso de falha o arquivo parcial é removido,
+    e um Parquet truncado nunca ocupa o lugar da conversão.
+    """
+    tmp_path = f"{output_path}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _cast_mixed_object_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte para texto as colunas 'object' que misturam números e textos, que o
+    pyarrow não consegue gravar como uma única coluna Parquet. Os nulos são mantidos.
+    """
+    for col in df.select_dtypes(include=['object']).columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) in ('mixed', 'mixed-integer'):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+def _source_signature(input_path: str) -> bytes:
+    """Identifica a versão de um arquivo de origem pelo seu mtime e tamanho."""
+    stat = os.stat(input_path)
+    return json.dumps([stat.st_mtime, stat.st_size]).encode()
+
+def _stream_csv_to_parquet(
+    input_path: str, output_path: str, metadata: Optional[Dict[bytes, bytes]] = None
+) -> Tuple[int, int]:
+    """
+    Converte um CSV em Parquet bloco a bloco, sem carregar o arquivo inteiro na memória.
+
+    O leitor do pyarrow fixa o schema no primeiro bloco. As colunas de texto com
+    cara de data também são identificadas nele, e o mesmo formato é aplicado aos
+    blocos seguintes para que todos compartilhem o schema do arquivo de saída.
+
+    Returns:
+        Tuple[int, int]: Formato (linhas, colunas) gravado.
+
+    A escrita é feita em um arquivo temporário, que só substitui output_path ao
+    final da conversão. `metadata` é acrescentado aos metadados do schema gravado.
+
+    Raises:
+        pa.ArrowInvalid, pa.ArrowTypeError: Se um bloco não for compatível com o
+            schema do primeiro.
+    """
+    reader = pa_csv.open_csv(input_path, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE))
+    # O ParquetWriter recebe o tamanho do row group a cada escrita, não na criação
+    writer_options = {k: v for k, v in PARQUET_WRITE_OPTIONS.items() if k != "row_group_size"}
+    writer, schema, date_formats, n_rows = None, None, {}, 0
+    with _atomic_output(output_path) as tmp_path:
+        try:
+            for batch in reader:
+                df = batch.to_pandas()
+                if writer is None:
+                    for col in df.select_dtypes(include=['object']).columns:
+                        if _to_datetime_if_dates(df[col]) is not None:
+                            date_formats[col] = _guess_datetime_format(df[col])
+                for col, date_format in date_formats.items():
+                    df[col] = pd.to_datetime(df[col], format=date_format, dayfirst=True, errors="coerce")
+
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    writer = pq.ParquetWriter(
+                        tmp_path, schema.with_metadata({**(schema.metadata or {}), **(metadata or {})}),
+                        **writer_options,
+                    )
+                writer.write_table(table, row_group_size=PARQUET_WRITE_OPTIONS["row_group_size"])
+                n_rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if schema is None:
+            raise pa.ArrowInvalid("CSV sem linhas de dados")
+    return n_rows, len(schema.names)
+
 @timer_decorator
 def convert_spreadsheet_to_parquet(
     input_path: str, output_path: Optional[str] = None
@@ -357,32 +959,44 @@ def convert_spreadsheet_to_parquet(
 
     input_file = Path(input_path)
     file_extension = input_file.suffix.lower()
+    if output_path is None:
+        output_path = str(input_file.with_suffix(".parquet"))
 
+    # Registra a origem no Parquet para que convert_spreadsheet_if_outdated possa validá-lo
+    metadata = {SOURCE_METADATA_KEY: _source_signature(input_path)}
     try:
         if file_extension == ".csv":
-            df = pd.read_csv(input_path)
+            try:
+                shape = _stream_csv_to_parquet(input_path, output_path, metadata)
+                print(f"\nSucesso! Arquivo (DF_shape:{shape}) salvo em: {output_path}")
+                return output_path
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                # Tipos inconsistentes entre blocos: lê o arquivo inteiro com o pandas,
+                # inferindo cada coluna de uma vez (low_memory=False) em vez de por partes
+                print(f"\nAviso: conversão em blocos falhou ({e}); lendo o CSV inteiro.")
+                df = pd.read_csv(input_path, low_memory=False)
         elif file_extension == ".xlsx":
-            df = pd.read_excel(input_path)
+            df = _read_excel(input_path)
         else:
             print(f"\nErro: Formato de arquivo '{file_extension}' não suportado. Use .csv ou .xlsx.")
             return None
 
+        df = _cast_mixed_object_columns(df)
+
         # Adicionado: Tenta converter colunas 'object' que se parecem com datas
         # para o tipo datetime64, que é compatível com Parquet (pyarrow).
         for col in df.select_dtypes(include=['object']).columns:
-            # Usar `errors='coerce'` transforma valores inválidos em NaT.
-            # Isso garante que a coluna se torne do tipo datetime64, resolvendo o erro.
-            temp_series = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-            
-            # Apenas substitui a coluna original se a conversão foi bem-sucedida
-            # para pelo menos um valor, evitando destruir colunas de texto.
-            if temp_series.notna().any():
-                df[col] = temp_series
+            temp_series = _to_datetime_if_dates(df[col])
 
-        if output_path is None:
-            output_path = str(input_file.with_suffix(".parquet"))
+            # Apenas substitui a coluna original se a amostra indicou uma coluna de datas,
+            # evitando destruir colunas de texto.
+            if temp_series is not None:
+                df[col] = temp_series
 
-        df.to_parquet(output_path, index=False)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+        with _atomic_output(output_path) as tmp_path:
+            pq.write_table(table, tmp_path, **PARQUET_WRITE_OPTIONS)
         print(f"\nSucesso! Arquivo (DF_shape:{df.shape}) salvo em: {output_path}")
         return output_path
 
@@ -390,21 +1004,49 @@ def convert_spreadsheet_to_parquet(
         print(f"\nOcorreu um erro durante o processo: {e}")
         return None
 
+def convert_spreadsheet_if_outdated(input_path: str) -> Optional[str]:
+    """
+    Converte a planilha para Parquet apenas se ainda não houver uma conversão atualizada.
+
+    O .parquet salvo ao lado da planilha é reaproveitado quando os seus metadados
+    registram o mtime e o tamanho atuais da planilha. Comparar apenas as datas não
+    basta: um Parquet de outra versão (ou gravado pela metade) pode ser mais recente.
+
+    Returns:
+        Optional[str]: O caminho do arquivo Parquet ou None em caso de erro.
+    """
+    parquet_path = Path(input_path).with_suffix(".parquet")
+    if os.path.exists(input_path) and parquet_path.exists():
+        try:
+            stored = (pq.read_schema(parquet_path).metadata or {}).get(SOURCE_METADATA_KEY)
+        except (OSError, pa.ArrowInvalid):
+            stored = None  # Parquet corrompido ou incompleto: é reconvertido
+        if stored == _source_signature(input_path):
+            print(f"\nParquet já atualizado, conversão ignorada: {parquet_path}")
+            return str(parquet_path)
+    return convert_spreadsheet_to_parquet(input_path)
+
 @timer_decorator
 def aggregate_column_to_list(
-    df: pd.DataFrame, key_column: str, column_to_aggregate: str
+    df: pd.DataFrame,
+    key_column: str,
+    column_to_aggregate: str,
+    keep_cols: Optional[List[str]] = None,
 ) -> pd.DataFrame:
     """
     Agrupa um DataFrame por uma coluna chave e agrega os valores de outra
     coluna em uma lista, tornando a chave única.
 
     Para as demais colunas, o primeiro valor encontrado para cada chave é mantido.
+    As chaves ficam na ordem em que aparecem no DataFrame (sem ordenação).
 
     Args:
         df (pd.DataFrame): DataFrame de entrada.
         key_column (str): Coluna para agrupar (ex: 'Proc. Identificação').
         column_to_aggregate (str): Coluna cujos valores serão agregados em uma lista
                                    (ex: 'Proc. Tipo Penal').
+        keep_cols (List[str], optional): Demais colunas a manter no resultado. Se None,
+                                   mantém todas; restringir evita agregar colunas descartadas depois.
 
     Returns:
         pd.DataFrame: DataFrame com a `key_column` única.
@@ -414,11 +1056,12 @@ def aggregate_column_to_list(
 
     # Define as regras de agregação
     agg_rules = {
-        col: "first" for col in df.columns if col not in [key_column, column_to_aggregate]
+        col: "first" for col in df.columns
+        if col not in [key_column, column_to_aggregate] and (keep_cols is None or col in keep_cols)
     }
     agg_rules[column_to_aggregate] = list
 
-    df_aggregated = df.groupby(key_column).agg(agg_rules).reset_index()
+    df_aggregated = df.groupby(key_column, sort=False, observed=True, as_index=False).agg(agg_rules)
 
     print(f"\nDataframe com colunas agregadas:\n Shape anteior: {df.shape}\n Shape após: {df_aggregated.shape}\n")
     return df_aggregated
@@ -453,10 +1096,62 @@ def merge_dataframes(
     
     print(f"Shape df1: {df_left.shape}")
     print(f"Shape df2: {df_right.shape}")
-    merged_df = pd.merge(df_left, df_right, on=key_column, how=how)
+    overlap = (set(df_left.columns) & set(df_right.columns)) - {key_column}
+    if how == "left" and not overlap and df_right[key_column].is_unique:
+        # Chave única à direita: o join por índice evita a etapa de hash do merge
+        merged_df = df_left.join(df_right.set_index(key_column), on=key_column, how="left", sort=False)
+        merged_df.index = pd.RangeIndex(len(merged_df))  # Mesmo índice devolvido pelo pd.merge
+    else:
+        merged_df = pd.merge(df_left, df_right, on=key_column, how=how)
     print(f"\nShape merged: {merged_df.shape}\n")
     return merged_df
 
+@timer_decorator
+def merge_aggregated_arrow(
+    table_left: pa.Table,
+    table_right: pa.Table,
+    key_column: str,
+    column_to_aggregate: str,
+) -> pa.Table:
+    """
+    Equivalente em Arrow de aggregate_column_to_list seguido de um merge 'left'.
+
+    A tabela da direita é agrupada pela chave (primeiro valor não-nulo das demais
+    colunas e lista dos valores de `column_to_aggregate`) e suas colunas são anexadas
+    à da esquerda, preservando a ordem das linhas. Tudo ocorre em C++, sem criar
+    objetos Python por célula; o join do Arrow não aceita listas, por isso as linhas
+    são alinhadas com index_in/take (a chave é única após a agregação).
+
+    Raises:
+        ValueError: Se a chave não existir em ambas as tabelas ou se houver outras
+            colunas em comum (o merge do pandas as renomearia com sufixos).
+    """
+    if key_column not in table_left.column_names or key_column not in table_right.column_names:
+        raise ValueError(
+            f"A coluna chave '{key_column}' não foi encontrada em ambas as tabelas."
+        )
+    overlap = (set(table_left.column_names) & set(table_right.column_names)) - {key_column}
+    if overlap:
+        raise ValueError(f"Colunas presentes em ambas as tabelas: {sorted(overlap)}")
+
+    other_columns = [col for col in table_right.column_names if col not in (key_column, column_to_aggregate)]
+    aggregations = [(col, "first") for col in other_columns] + [(column_to_aggregate, "list")]
+    # use_threads=False é exigido pelo 'first', que depende da ordem das linhas
+    aggregated = table_right.group_by(key_column, use_threads=False).aggregate(aggregations)
+    aggregated = aggregated.rename_columns(
+        {f"{col}_first": col for col in other_columns} | {f"{column_to_aggregate}_list": column_to_aggregate}
+    )
+
+    positions = pc.index_in(table_left[key_column], value_set=aggregated[key_column])
+    right_part = aggregated.drop_columns([key_column]).take(positions)
+
+    merged = table_left
+    for name in [*other_columns, column_to_aggregate]:
+        merged = merged.append_column(name, right_part[name])
+
+    print(f"\nShape merged: ({merged.num_rows}, {merged.num_columns})\n")
+    return merged
+
 @timer_decorator
 def filter_columns(df: pd.DataFrame, columns_to_keep: List[str]) -> pd.DataFrame:
     """
@@ -493,6 +1188,8 @@ def confirm_cols_exploded(df: pd.DataFrame, key_column: str):
 
     Returns:
         list: Lista de colunas explodidas.
+
+    Linhas com a chave nula são ignoradas, como no groupby (dropna=True).
     """
     # 1. Isolar apenas as linhas onde o 'Proc. Identificação' é duplicado
     df_com_duplicatas = df[df.duplicated(subset=[key_column], keep=False)]
@@ -500,15 +1197,28 @@ def confirm_cols_exploded(df: pd.DataFrame, key_column: str):
     if df_com_duplicatas.empty:
         print("Não foram encontradas duplicatas na coluna chave. Nenhuma verificação é necessária.")
     else:
-        # 2. Agrupar pela key_column e contar valores únicos em cada coluna
-        verificacao_unicidade = df_com_duplicatas.groupby(key_column).agg({col: 'nunique' for col in df_com_duplicatas.columns if col != key_column})
-
-        # 3. Identificar colunas que têm valores variados
-        # Uma coluna é "explodida" se sua contagem de valores únicos (nunique) for > 1
-        explodidas = verificacao_unicidade[verificacao_unicidade > 1].sum()
-        
-        # Filtra para mostrar apenas as colunas que apresentaram variação
-        lista_cols_explodidas = explodidas[explodidas > 0].index.tolist()
+        # 2. Ordenar as linhas pelo código inteiro da chave, deixando as linhas de cada chave adjacentes.
+        # Chaves nulas (código -1) ficam de fora, como no groupby, em vez de formarem um grupo
+        codigos_chave, _ = pd.factorize(df_com_duplicatas[key_column])
+        com_chave = np.flatnonzero(codigos_chave != -1)
+        ordem = com_chave[np.argsort(codigos_chave[com_chave], kind='stable')]
+        codigos_chave = codigos_chave[ordem]
+
+        # 3. Uma coluna é "explodida" se, dentro de alguma chave, houver dois valores
+        # não-nulos diferentes (o mesmo que nunique > 1). Basta comparar cada valor
+        # com o anterior da mesma chave, sem montar conjuntos por grupo.
+        lista_cols_explodidas = []
+        for col in df_com_duplicatas.columns:
+            if col == key_column:
+                continue
+            try:
+                codigos = pd.factorize(df_com_duplicatas[col])[0][ordem]  # Nulos recebem -1
+            except TypeError:
+                continue  # Valores não "hashable" (ex: listas) não podem ser fatorados
+            validos = codigos != -1
+            codigos, chaves = codigos[validos], codigos_chave[validos]
+            if np.any((codigos[1:] != codigos[:-1]) & (chaves[1:] == chaves[:-1])):
+                lista_cols_explodidas.append(col)
 
         return lista_cols_explodidas
 
@@ -563,16 +1273,16 @@ colunas_uteis = [
 ]
 
 type_mapping = {
-    'Proc. Tipo':			            'string' ,
+    'Proc. Tipo':			            'category',
     'Proc. Identificação':              'string' ,
     'Número do Processo':               'string' ,
-    'Proc. Situação':                   'string' ,
-    'Situação Sigla':                   'string' ,
-    'Unidade UF':                       'string' ,
-    'Lotação Sigla':                    'string' ,
-    'Proc. Delegacia':                  'string' ,
-    'Proc. Delegado Atual':             'string' ,
-    'Proc. Escrivão':                   'string' ,
+    'Proc. Situação':                   'category',
+    'Situação Sigla':                   'category',
+    'Unidade UF':                       'category',
+    'Lotação Sigla':                    'category',
+    'Proc. Delegacia':                  'category',
+    'Proc. Delegado Atual':             'category',
+    'Proc. Escrivão':                   'category',
     'Data Fato':                        'datetime',
     'Data Recebimento':                 'datetime',
     'Data Cadastro':                    'datetime',
@@ -583,11 +1293,11 @@ type_mapping = {
     'Data Encerrado':                   'datetime',
     'Duração Dias':                     'numeric' ,
     'Última Movimentação':              'datetime',
-    'Proc. Tipo Documento':             'string' ,
-    'Proc. Origem Documento':           'string' ,
-    'Proc. Área de Atribuição':         'string' ,
-    'Matéria Registro Especial':        'string' ,
-    'Proc. Tratamento Especial':        'string' ,
+    'Proc. Tipo Documento':             'category',
+    'Proc. Origem Documento':           'category',
+    'Proc. Área de Atribuição':         'category',
+    'Matéria Registro Especial':        'category',
+    'Proc. Tratamento Especial':        'category',
     'Proc. Tipo Penal':                 'string' ,
     'Proc. Incidência Penal Principal': 'string' ,    
 }
@@ -611,31 +1321,51 @@ rename_cols_mapping = {
 file_name = "Casos_SP_XX-09-2025"
 
 @timer_decorator
-def pipeline_tratatamento_dados():
+def pipeline_tratatamento_dados(verbose: bool = True):
+    """
+    Converte as planilhas, agrega o 'Proc. Tipo Penal', aplica os tipos e salva o Parquet tratado.
+
+    Com verbose=False os relatórios de diagnóstico (info e tabela de colunas, que
+    percorrem todas as colunas para contar nulos e únicos) não são gerados.
+    """
 
     xlsx_principal = rf"C:\\Users\\edson.eab\\Downloads\\{file_name}.xlsx"
     xlsx_complementar = rf"C:\\Users\\edson.eab\\Downloads\\{file_name}_Complementar.xlsx"
 
-    path_parquet_df_principal = convert_spreadsheet_to_parquet(xlsx_principal)
-    path_parquet_df_complementar = convert_spreadsheet_to_parquet(xlsx_complementar)
+    path_parquet_df_principal = convert_spreadsheet_if_outdated(xlsx_principal)
+    path_parquet_df_complementar = convert_spreadsheet_if_outdated(xlsx_complementar)
+
+    # Apenas as colunas úteis (e a chave) são lidas dos Parquets; as demais nem são decodificadas
+    key_column = 'Proc. Identificação'
+    cols_principal = _parquet_column_names(path_parquet_df_principal)
+    cols_complementar = _parquet_column_names(path_parquet_df_complementar)
+    colunas_principal = [col for col in cols_principal if col in colunas_uteis or col == key_column]
+    colunas_complementar = [
+        col for col in cols_complementar
+        if col in (key_column, 'Proc. Tipo Penal') or (col in colunas_uteis and col not in cols_principal)
+    ]
 
     # O df_principal deve possuir a coluna de valores únicos 'Proc. Identificação'
-    df_principal  = pd.read_parquet(path_parquet_df_principal)
-    assert 'Proc. Identificação' in df_principal.columns and df_principal['Proc. Identificação'].nunique() == df_principal.shape[0], "O df_principal deve possuir a coluna de valores únicos 'Proc. Identificação'"
+    table_principal = _read_parquet_table(path_parquet_df_principal, colunas_principal)
+    assert key_column in table_principal.column_names and pc.count_distinct(table_principal[key_column]).as_py() == table_principal.num_rows, "O df_principal deve possuir a coluna de valores únicos 'Proc. Identificação'"
 
     # O df_complementar possui 'Proc. Identificação' duplicados em razão da coluna 'Proc. Tipo Penal' constar explodida
-    df_complementar = pd.read_parquet(path_parquet_df_complementar)
-    assert confirm_cols_exploded(df_complementar, 'Proc. Identificação') == ['Proc. Tipo Penal']
-
-    df_complementar_tratado = aggregate_column_to_list(df=df_complementar, key_column='Proc. Identificação', column_to_aggregate='Proc. Tipo Penal')
+    table_complementar = _read_parquet_table(path_parquet_df_complementar, colunas_complementar)
+    assert confirm_cols_exploded(table_complementar.to_pandas(), key_column) == ['Proc. Tipo Penal']
 
-    df_completo = merge_dataframes(df_principal, df_complementar_tratado, key_column='Proc. Identificação', how='left')
+    # Agregação e merge feitos no Arrow: o DataFrame pandas é criado uma única vez
+    table_completo = merge_aggregated_arrow(table_principal, table_complementar, key_column=key_column, column_to_aggregate='Proc. Tipo Penal')
 
-    assert df_principal.shape[0] == df_completo.shape[0], "O df_principal deve possuir a mesma quantidade de linhas do df_completo"
-    assert df_principal.shape[1] < df_completo.shape[1], "O df_principal deve possuir menos colunas do que o df_completo"
+    assert table_principal.num_rows == table_completo.num_rows, "O df_principal deve possuir a mesma quantidade de linhas do df_completo"
+    assert table_principal.num_columns < table_completo.num_columns, "O df_principal deve possuir menos colunas do que o df_completo"
 
     output_path_0 = rf"C:\\Users\\edson.eab\\Downloads\\{file_name}_Completo.parquet"
-    df_completo.to_parquet(output_path_0, index=False)
+    pq.write_table(table_completo, output_path_0, **PARQUET_WRITE_OPTIONS)
+
+    df_completo = table_completo.to_pandas()
+    # Listas do Arrow chegam como arrays NumPy; listas Python mantêm a representação em texto usada pela aplicação
+    df_completo['Proc. Tipo Penal'] = table_completo['Proc. Tipo Penal'].to_pylist()
+    del table_principal, table_complementar, table_completo
 
     # df['Proc. Identificação'].value_counts()
     # df.duplicated().sum()
@@ -644,16 +1374,18 @@ def pipeline_tratatamento_dados():
     # column_info = detect_column_types(df_reduzido) # print(column_info) 
 
     df_final, _ = apply_column_types(df_reduzido, type_mapping)
-    print(df_final.info())
+    if verbose:
+        df_final.info()
 
     df_final = df_final.rename(columns=rename_cols_mapping)
 
     # info_df = create_info_dataframe(df_final) # print(info_df) # já feito em print_dataframe_info
 
-    print_dataframe_info(df_final)
+    if verbose:
+        print_dataframe_info(df_final)
 
     output_path = rf"C:\\Users\\edson.eab\\Downloads\\{file_name}_Tratado.parquet"
-    df_final.to_parquet(output_path, index=False)
+    df_final.to_parquet(output_path, index=False, engine="pyarrow", **PARQUET_WRITE_OPTIONS)
 
     # filtered_df = df.loc[df['Proc. Situação'] == "Em Andamento"]
     # exloded_df = filtered_df.explode('Proc. Tipo Penal')
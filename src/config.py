@@ -1,14 +1,32 @@
 # src/config.py
 
-from typing import Dict, List, Set, Union
+from typing import Any, Dict, List, Set, Union
 
 # --- Paths and Constants ---
 PATH_DF_TRATADO_PARQUET: str = "data/Casos_SRSP_16-09-2025_Tratado.parquet"
+# Cópia com tipos otimizados, gerada no primeiro carregamento para ser reaproveitada
+PATH_DF_OTIMIZADO_PARQUET: str = "data/cache/Casos_SRSP_16-09-2025_Otimizado.parquet"
 KEY_COLUMN_PRINCIPAL: str = 'Caso Id'
 N_LINHAS_VISIVEIS: int = 100
 
 TITULO = "Dashboard de Análise de Casos"
 
+# Opções de escrita Parquet: zstd comprime mais que o snappy padrão com velocidade similar,
+# e row groups menores permitem que leituras com filtros pulem blocos pelas estatísticas
+PARQUET_WRITE_OPTIONS: Dict[str, Any] = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "row_group_size": 64_000,
+    "use_dictionary": True,
+    "data_page_size": 1 << 20,
+}
+
+# Chave, nos metadados dos Parquets gerados, que registra de qual arquivo de origem eles vieram
+SOURCE_METADATA_KEY: bytes = b"epoldata_source"
+
+# Exibe controles de diagnóstico (ex: limpeza de cache) na barra lateral
+MODO_DEBUG: bool = False
+
 INFO_HEADER = "Bem-vindo ao Dashboard de Análise de Casos"
 INFO_MD = """
     Este painel interativo foi projetado para explorar e analisar os dados de casos.
@@ -25,9 +43,26 @@ INFO_MD = """
 
     """
 
+# --- Navegação ---
+# Abas opcionais: desativá-las remove a aba da navegação sem alterar o app.py
+HABILITAR_ANALISE_CRUZADA: bool = True
+HABILITAR_SERIE_TEMPORAL: bool = True
+
+# Chave usada na URL (ex: ?tab=agregacoes) -> rótulo exibido na barra de abas
+ABAS_APP: Dict[str, str] = {
+    'inicio': "📊 Início",
+    'geral': "📋 Tabela Geral",
+    'agregacoes': "📈 Agregações",
+    **({'cruzada': "🔗 Análise Cruzada"} if HABILITAR_ANALISE_CRUZADA else {}),
+    **({'temporal': "⏳ Série Temporal"} if HABILITAR_SERIE_TEMPORAL else {}),
+}
+
 # --- Data Cleaning ---
 NULLS_PLACEHOLDERS_TO_DROP: List[str] = ['-', '', 'None', '<NA>', 'nan', 'nat', 'undefined']
 
+# Colunas de texto com proporção de valores distintos abaixo deste limite viram 'category'
+LIMIAR_CARDINALIDADE_CATEGORIA: float = 0.5
+
 # --- UI Defaults ---
 JSON_FILTROS_DEFAULT: Dict[str, Union[str, List[str]]] = {
     'Situação': "Em Andamento",
@@ -1,20 +1,127 @@
 # src/data_loader.py
 
+import hashlib, json, os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import streamlit as st
 from . import config
 
-@st.cache_data
+ARROW_STRING_DTYPE = pd.StringDtype("pyarrow")
+
+def _arrow_types_mapper(arrow_type: pa.DataType):
+    """Mantém as colunas de texto do Parquet em buffers Arrow ao converter para pandas."""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return ARROW_STRING_DTYPE
+    return None
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduz a memória do DataFrame e acelera filtros e agrupamentos.
+
+    Colunas de texto com poucos valores distintos passam a 'category' (códigos
+    inteiros no lugar de um ponteiro por string) e colunas inteiras são rebaixadas
+    para o menor tipo que comporta seus valores.
+    """
+    n_rows = len(df)
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        try:
+            n_unique = df[col].nunique(dropna=False)
+        except TypeError:
+            continue  # Valores não "hashable" (ex: listas) não podem virar 'category'
+        if n_rows > 0 and n_unique / n_rows < config.LIMIAR_CARDINALIDADE_CATEGORIA:
+            df[col] = df[col].astype('category')
+
+    # O texto restante (alta cardinalidade, ex: identificadores) fica em buffers Arrow:
+    # ocupa menos memória que um objeto Python por célula, ordena mais rápido e chega
+    # ao st.dataframe sem conversão célula a célula
+    for col in df.select_dtypes(include=['object']).columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+            df[col] = df[col].astype(ARROW_STRING_DTYPE)
+
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    return df
+
 def load_data() -> pd.DataFrame:
     """
     Carrega o DataFrame a partir do arquivo Parquet especificado na configuração.
-    Utiliza o cache do Streamlit para evitar recarregamentos desnecessários.
+
+    A chave do cache é (caminho, mtime, tamanho) do arquivo de origem: os reruns
+    do Streamlit reaproveitam o DataFrame já carregado, e uma nova versão do
+    arquivo é lida imediatamente, sem esperar a expiração do cache.
     """
+    path = config.PATH_DF_TRATADO_PARQUET
     try:
-        df = pd.read_parquet(config.PATH_DF_TRATADO_PARQUET)
-        return df
+        stat = os.stat(path)
     except FileNotFoundError:
-        st.error(f"Arquivo não encontrado em: {config.PATH_DF_TRATADO_PARQUET}")
+        st.error(f"Arquivo não encontrado em: {path}")
         return pd.DataFrame()
-    
+    return _load_data(path, stat.st_mtime, stat.st_size)
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _load_data(path: str, source_mtime: float, source_size: int) -> pd.DataFrame:
+    """
+    Lê e otimiza o DataFrame; mtime e tamanho entram apenas na chave do cache.
+    O spinner é exibido por quem chama (app.py), por isso fica desativado aqui.
+
+    Na primeira carga os tipos são otimizados e o resultado é salvo em uma cópia
+    Parquet, reaproveitada enquanto o arquivo de origem não for modificado.
+    """
+    df = _read_optimized(path, source_mtime, source_size)
+    # Identifica a versão dos dados; é herdada pelos recortes e usada por dataframe_fingerprint
+    df.attrs['source'] = (path, source_mtime, source_size)
+    return df
+
+def _read_optimized(path: str, source_mtime: float, source_size: int) -> pd.DataFrame:
+    """
+    Lê a cópia otimizada se ela tiver sido gerada a partir desta versão do arquivo
+    de origem; caso contrário, otimiza a origem e recria a cópia.
+
+    A origem (caminho, mtime, tamanho) fica gravada nos metadados da cópia. Comparar
+    apenas as datas não basta: o caminho da origem pode mudar na configuração, e
+    arquivos descompactados ou copiados podem manter um mtime antigo.
+    """
+    cache_path = config.PATH_DF_OTIMIZADO_PARQUET
+    signature = json.dumps([os.path.abspath(path), source_mtime, source_size]).encode()
+    if os.path.exists(cache_path):
+        try:
+            stored = (pq.read_schema(cache_path).metadata or {}).get(config.SOURCE_METADATA_KEY)
+        except (OSError, pa.ArrowInvalid):
+            stored = None  # Cópia corrompida ou incompleta: é recriada abaixo
+        if stored == signature:
+            table = pq.read_table(cache_path, use_pandas_metadata=True)
+            # Sem o types_mapper, as colunas 'string[pyarrow]' voltariam como string[python]
+            return table.to_pandas(self_destruct=True, types_mapper=_arrow_types_mapper)
+
+    df = optimize_dtypes(pd.read_parquet(path))
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), config.SOURCE_METADATA_KEY: signature})
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        pq.write_table(table, cache_path, **config.PARQUET_WRITE_OPTIONS)
+    except OSError:
+        pass  # Sem permissão de escrita: segue apenas com o cache em memória
+    return df
+
+def dataframe_fingerprint(df: pd.DataFrame) -> tuple:
+    """
+    Gera uma assinatura leve do DataFrame para ser usada como chave de cache.
+
+    Os recortes da aplicação derivam do DataFrame carregado e herdam dele a
+    origem (caminho, mtime, tamanho) guardada em df.attrs['source']: origem,
+    formato, colunas e índice identificam o conteúdo sem que os valores sejam
+    lidos. Sem a origem, os valores entram no hash. O id() do objeto não serve,
+    pois o st.cache_data devolve uma cópia nova a cada rerun.
+    """
+    source = df.attrs.get('source')
+    hashed = df.index if source is not None else df
+    try:
+        hashes = pd.util.hash_pandas_object(hashed, index=True)
+    except TypeError:
+        hashes = pd.util.hash_pandas_object(hashed.astype(str), index=True)  # Valores não "hashable" (ex: listas)
+    return (source, df.shape, tuple(df.columns), hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest())
 
+# Usado nos decoradores @st.cache_data que recebem DataFrames como argumento
+DATAFRAME_HASH_FUNCS = {pd.DataFrame: dataframe_fingerprint}
@@ -1,10 +1,12 @@
 # src/gui_components.py
 import io, ast
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from . import config
+from . import data_loader
 from . import state_manager
 
 def load_custom_css():
@@ -16,22 +18,16 @@ def load_custom_css():
                 min-width: 300px !important; /* é necessário para sobrescrever o estilo padrão */
             }
 
-            /* Ajusta a posição vertical das abas */
-            div[data-testid="stTabs"] {
+            /* Ajusta a posição vertical da barra de abas */
+            div.st-key-active_tab {
                 margin-top: -35px;
             }
                 
             /* Realça os rótulos das abas (sem fixação) */
-            button[data-baseweb="tab"] {
+            div.st-key-active_tab label p {
                 font-size: 1.1rem !important;
                 font-weight: 600 !important;
             }
-                
-            /* Realça a aba ativa com a cor primária do tema */
-            button[data-baseweb="tab"][aria-selected="true"] {
-                color: var(--primary-color) !important;
-                border-bottom-color: var(--primary-color) !important;
-            }
 
             /* Reduz o espaçamento inferior dos grupos de botões de rádio */
             div[data-testid="stRadio"] {
@@ -72,6 +68,25 @@ def display_active_filters():
     else:
         st.info("Nenhum filtro aplicado. Exibindo todos os registros.")
 
+def create_tab_selector() -> str:
+    """
+    Cria a barra de navegação entre as abas e retorna a chave da aba ativa.
+
+    Diferente do st.tabs, que executa o conteúdo de todas as abas a cada rerun,
+    apenas a aba selecionada é renderizada.
+    """
+    active_tab = st.radio(
+        "Navegação",
+        options=list(config.ABAS_APP),
+        format_func=config.ABAS_APP.get,
+        key="active_tab",
+        horizontal=True,
+        label_visibility="collapsed",
+        on_change=state_manager.sync_active_tab,
+    )
+    st.divider()
+    return active_tab
+
 def display_home_tab():
     """Exibe o conteúdo da aba 'Início'."""
     st.header(config.INFO_HEADER)
@@ -79,12 +94,37 @@ def display_home_tab():
 
 @st.cache_data
 def to_excel(df: pd.DataFrame) -> bytes:
-    """Converte um DataFrame para um arquivo Excel em memória."""
+    """
+    Converte um DataFrame para um arquivo Excel em memória.
+
+    Usa o xlsxwriter, que só escreve (sem manter o modelo da planilha em objetos
+    Python como o openpyxl) e gera o arquivo em cerca de 60% do tempo.
+    """
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
         df.to_excel(writer, index=False, sheet_name='Dados')
     return output.getvalue()
 
+# cache_resource devolve a mesma lista a cada rerun, sem a cópia (pickle) do cache_data,
+# que custaria caro com centenas de milhares de opções; as listas não são alteradas.
+# Duas entradas (filtros principais e secundários): versões anteriores dos dados são descartadas
+@st.cache_resource(max_entries=2, show_spinner=False, hash_funcs=data_loader.DATAFRAME_HASH_FUNCS)
+def get_filter_options(df: pd.DataFrame, columns: tuple[str, ...]) -> dict[str, list]:
+    """Calcula uma única vez por DataFrame as opções (valores distintos ordenados) dos filtros."""
+    return {col: _sorted_unique_values(df[col]) for col in columns}
+
+def _sorted_unique_values(series: pd.Series) -> list:
+    """
+    Valores distintos e não nulos da coluna, em ordem crescente.
+
+    Em colunas 'category' as próprias categorias já são o conjunto de valores (o
+    DataFrame carregado não tem categorias sem uso); nas demais a ordenação é
+    feita pelo pandas, e não pelo sorted() do Python, elemento a elemento.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return sorted(series.cat.categories)
+    return pd.Series(series.dropna().unique()).sort_values().tolist()
+
 def create_sidebar(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
     """
     Cria a barra lateral de filtros e retorna o DataFrame filtrado
@@ -92,49 +132,70 @@ def create_sidebar(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
     """
     # st.sidebar.header("Filtros")
 
-    df_filtered = df.copy()
+    # Cada filtro gera uma máscara sobre o DataFrame original; as linhas só são
+    # copiadas uma vez, no final, e apenas se algum filtro estiver ativo
+    filter_masks = []
     
     # Filtro para selecionar colunas
     all_columns = df.columns.tolist()
 
     # Filtros principais
     with st.sidebar.expander("Filtros Principais", expanded=True):
-        for col in all_columns:
-            if col in config.LIST_FILTROS_SECUNDARIOS:
-                continue
-            
-            options = sorted(df[col].dropna().unique())
+        primary_columns = [col for col in all_columns if col not in config.LIST_FILTROS_SECUNDARIOS]
+        primary_options = get_filter_options(df, tuple(primary_columns))
+        for col in primary_columns:
             selected = st.multiselect(
                 f"{col}",
-                options=options,
+                options=primary_options[col],
                 key=f"filter_{col}", # Adiciona uma key prefixada
                 on_change=state_manager.invalidate_excel_file
             )
             if selected:
-                df_filtered = df_filtered[df_filtered[col].isin(selected)]
+                filter_masks.append(df[col].isin(selected).to_numpy())
 
     # Filtros secundários em um expander
+    # Têm centenas de milhares de opções (ids, datas); os widgets só são montados e
+    # enviados ao navegador quando exibidos. Ocultos, as seleções continuam valendo.
     with st.sidebar.expander("Filtros Secundários", expanded=False):
-        for col in config.LIST_FILTROS_SECUNDARIOS:
-            if col in df.columns:
-                options = sorted(df[col].dropna().unique())
+        show_secondary = st.toggle("Exibir filtros secundários", key="show_secondary_filters")
+        secondary_columns = [col for col in config.LIST_FILTROS_SECUNDARIOS if col in df.columns]
+        if show_secondary:
+            secondary_options = get_filter_options(df, tuple(secondary_columns))
+        for col in secondary_columns:
+            if show_secondary:
                 selected = st.multiselect(
                     f"{col}",
-                    options=options,
-                    default=[],
+                    options=secondary_options[col],
                     key=f"filter_{col}", # Adiciona uma key prefixada
                     on_change=state_manager.invalidate_excel_file
                 )
-                if selected:
-                    df_filtered = df_filtered[df_filtered[col].isin(selected)]
+            else:
+                selected = st.session_state.get(f"filter_{col}", [])
+            if selected:
+                filter_masks.append(df[col].isin(selected).to_numpy())
 
     st.sidebar.button(
         "🧹 Limpar Todos os Filtros",
         on_click=state_manager.clear_filters, use_container_width=True,
         args=(df.columns.tolist(),), # Passa a lista de colunas para a função de reset
     )
-    return df_filtered
 
+    if config.MODO_DEBUG:
+        st.sidebar.button("♻️ Limpar Cache", on_click=state_manager.clear_cache, use_container_width=True)
+    # Sem filtros, o próprio DataFrame é repassado (as abas não o alteram)
+    return df[np.logical_and.reduce(filter_masks)] if filter_masks else df
+
+@st.cache_data(show_spinner=False, hash_funcs=data_loader.DATAFRAME_HASH_FUNCS)
+def get_sorted_positions(df: pd.DataFrame, sort_col: str, ascending: bool) -> np.ndarray:
+    """
+    Retorna as posições das linhas do DataFrame ordenadas pela coluna escolhida.
+
+    A ordenação é refeita apenas quando os filtros, a coluna ou a ordem mudam; trocar
+    as colunas exibidas ou preparar o download reaproveita o resultado em cache.
+    """
+    return df[sort_col].reset_index(drop=True).sort_values(ascending=ascending).index.to_numpy()
+
+@st.fragment
 def display_general_table_tab(df: pd.DataFrame):
     """Exibe o conteúdo da aba 'Tabela Geral'."""
     st.header(f"Visualização Geral dos Dados")
@@ -145,10 +206,13 @@ def display_general_table_tab(df: pd.DataFrame):
     with col2_i:
         st.metric("Total de Registros Filtrados", f"{len(df):,}".replace(",", "."))
     
+    # Valor inicial via session_state (e não 'default') para que a seleção persista entre as abas
+    if "multiselect_columns" not in st.session_state:
+        st.session_state.multiselect_columns = df.columns.tolist()
+
     selected_columns = st.multiselect(
         "Selecione as colunas a exibir:",
         options=df.columns.tolist(),
-        default=df.columns.tolist(),
         key="multiselect_columns", # Key para o reset
         on_change=state_manager.invalidate_excel_file
     )
@@ -168,18 +232,19 @@ def display_general_table_tab(df: pd.DataFrame):
         )
     
     is_ascending = sort_order == "Crescente"
-    df_sorted = df.sort_values(by=sort_col, ascending=is_ascending)
+    # Apenas as posições ordenadas ficam em cache; as linhas são montadas sob demanda
+    sorted_positions = get_sorted_positions(df, sort_col, is_ascending)
     
     st.info(f"Exibindo os {config.N_LINHAS_VISIVEIS} primeiros registros da tabela ordenada.")
     
-    st.dataframe(df_sorted[selected_columns].head(config.N_LINHAS_VISIVEIS))
+    st.dataframe(df.iloc[sorted_positions[:config.N_LINHAS_VISIVEIS]][selected_columns])
 
     # --- Lógica de Download Sob Demanda ---
     if 'excel_file' not in st.session_state:
         st.session_state.excel_file = None
 
     def generate_excel():
-        st.session_state.excel_file = to_excel(df_sorted[selected_columns])
+        st.session_state.excel_file = to_excel(df.iloc[sorted_positions][selected_columns])
 
     st.button("Preparar Download (xlsx)", on_click=generate_excel, use_container_width=True)
 
@@ -192,33 +257,66 @@ def display_general_table_tab(df: pd.DataFrame):
             use_container_width=True
         )
 
-# @st.cache_data # cache estava causando um erro de sincronismo com dataframe
-def prepare_agg_data(_df: pd.DataFrame, _col_agg: str) -> pd.DataFrame:
+# O DataFrame é identificado pela assinatura leve (formato, colunas e índice),
+# garantindo que o cache acompanhe os filtros sem serializar o DataFrame inteiro
+@st.cache_data(show_spinner=False, hash_funcs=data_loader.DATAFRAME_HASH_FUNCS)
+def prepare_agg_data(df: pd.DataFrame, col_agg: str) -> pd.DataFrame:
     """
     Prepara e agrega os dados para uma coluna específica.
     """
-    df_agg = _df.copy()
+    # Colunas 'category' (exceto as de listas) são agrupadas pelos códigos inteiros,
+    # sem materializar uma string por linha
+    if isinstance(df[col_agg].dtype, pd.CategoricalDtype) and col_agg not in config.LIST_COLS_TO_EXPLODE:
+        group_keys = _unify_null_placeholders(df[col_agg])
+        agg_data = df[config.KEY_COLUMN_PRINCIPAL].groupby(group_keys, observed=True).nunique().reset_index()
+        agg_data.columns = [col_agg, 'Contagem']
+        agg_data[col_agg] = agg_data[col_agg].astype(object)
+        return _add_percentual(agg_data)
+
+    # Apenas as colunas usadas na agregação são copiadas
+    df_agg = df[[col_agg, config.KEY_COLUMN_PRINCIPAL]].copy()
+
+    # Colunas 'category' não aceitam novos valores (ex: "Sem Registro") nem listas
+    if isinstance(df_agg[col_agg].dtype, pd.CategoricalDtype):
+        df_agg[col_agg] = df_agg[col_agg].astype(object)
 
     # --- Lógica Especial para Colunas com Listas (Explode) ---
-    if _col_agg in config.LIST_COLS_TO_EXPLODE:
-        series_to_analyze = df_agg[_col_agg]
+    if col_agg in config.LIST_COLS_TO_EXPLODE:
+        series_to_analyze = df_agg[col_agg]
 
         # 1. Converte strings que parecem listas (ex: "['a', 'b']") em objetos de lista
-        is_stringified_list = series_to_analyze.dropna().apply(
-            lambda x: isinstance(x, str) and x.startswith('[') and x.endswith(']')
-        ).any()
+        # As linhas repetem poucas listas distintas: cada valor distinto é analisado
+        # uma única vez e o resultado é expandido pelos códigos do factorize
+        try:
+            codes, uniques = pd.factorize(series_to_analyze)  # Nulos recebem o código -1
+        except TypeError:
+            codes, uniques = None, []  # Valores não "hashable": a coluna já contém listas
+
+        is_stringified_list = any(
+            isinstance(x, str) and x.startswith('[') and x.endswith(']') for x in uniques
+        )
 
         if is_stringified_list:
             # Usa ast.literal_eval que é seguro para esta conversão
-            series_to_analyze = series_to_analyze.apply(
-                lambda x: ast.literal_eval(x) if (isinstance(x, str) and x.startswith('[')) else x
-            )
-            df_agg[_col_agg] = series_to_analyze
+            literal_eval = ast.literal_eval  # Nome local: evita a busca do atributo a cada valor
+            parsed = np.empty(len(uniques) + 1, dtype=object)
+            for i, x in enumerate(uniques):
+                parsed[i] = literal_eval(x) if (isinstance(x, str) and x.startswith('[')) else x
+            parsed[-1] = np.nan  # Posição -1: valores nulos
+            series_to_analyze = pd.Series(parsed[codes], index=series_to_analyze.index, name=col_agg)
+            df_agg[col_agg] = series_to_analyze
 
         # 2. Se a coluna contém listas, "explode" o DataFrame
-        is_exploded_list = series_to_analyze.dropna().apply(isinstance, args=(list,)).any()
+        # Basta olhar os valores distintos já analisados; uma coluna que o factorize
+        # aceitou (valores "hashable") não pode conter listas
+        if is_stringified_list:
+            is_exploded_list = any(isinstance(x, list) for x in parsed)
+        elif codes is None:
+            is_exploded_list = series_to_analyze.dropna().apply(isinstance, args=(list,)).any()
+        else:
+            is_exploded_list = False
         if is_exploded_list:
-            df_agg = df_agg.explode(_col_agg)
+            df_agg = df_agg.explode(col_agg)
         
         if is_stringified_list and is_exploded_list:
             st.info(f"Convertendo strings de listas para análise e expandindo para contar cada item individualmente.")
@@ -227,13 +325,17 @@ def prepare_agg_data(_df: pd.DataFrame, _col_agg: str) -> pd.DataFrame:
         elif is_exploded_list:
             st.info(f"Expandindo listas para contar cada item individualmente.")
 
-    # df_agg = df_agg[~df_agg[_col_agg].isin(config.NULLS_PLACEHOLDERS_TO_DROP)]
+    # df_agg = df_agg[~df_agg[col_agg].isin(config.NULLS_PLACEHOLDERS_TO_DROP)]
 
     # Unifica todos os valores nulos e placeholders (ex: '-', '', <NA>) sob a mesma categoria
-    df_agg[_col_agg] = df_agg[_col_agg].replace(config.NULLS_PLACEHOLDERS_TO_DROP, "Sem Registro").fillna("Sem Registro")
+    df_agg[col_agg] = df_agg[col_agg].replace(config.NULLS_PLACEHOLDERS_TO_DROP, "Sem Registro").fillna("Sem Registro")
     
-    agg_data = df_agg.groupby(_col_agg)[config.KEY_COLUMN_PRINCIPAL].nunique().reset_index()
-    agg_data.columns = [_col_agg, 'Contagem']
+    agg_data = df_agg.groupby(col_agg)[config.KEY_COLUMN_PRINCIPAL].nunique().reset_index()
+    agg_data.columns = [col_agg, 'Contagem']
+    return _add_percentual(agg_data)
+
+def _add_percentual(agg_data: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta a coluna 'Percentual' (participação de cada grupo na contagem total)."""
     total_casos = agg_data['Contagem'].sum()
     
     if total_casos > 0:
@@ -243,6 +345,28 @@ def prepare_agg_data(_df: pd.DataFrame, _col_agg: str) -> pd.DataFrame:
         
     return agg_data
 
+def _unify_null_placeholders(series: pd.Series) -> pd.Categorical:
+    """
+    Equivalente, para colunas 'category', ao replace/fillna por "Sem Registro".
+
+    A substituição é feita apenas nas categorias; os códigos de cada linha são
+    remapeados para as novas categorias (ordenadas, como no groupby do pandas).
+    """
+    labels = series.cat.categories.astype(object)
+    labels = np.where(labels.isin(config.NULLS_PLACEHOLDERS_TO_DROP), "Sem Registro", labels)
+    # O código -1 (nulo) aponta para o "Sem Registro" anexado ao final
+    labels = np.append(labels.astype(object), "Sem Registro")
+    categories = pd.Index(pd.unique(labels))
+    try:
+        categories = categories.sort_values()
+    except TypeError:
+        # Categorias não textuais (ex: números) não se comparam com "Sem Registro",
+        # que vai para o final, como no groupby do pandas com valores mistos
+        categories = categories.drop("Sem Registro").sort_values().append(pd.Index(["Sem Registro"]))
+    codes = categories.get_indexer(labels)[series.cat.codes.to_numpy()]
+    return pd.Categorical.from_codes(codes, categories)
+
+@st.fragment
 def display_aggregations_tab(df: pd.DataFrame):
     """Exibe o conteúdo da aba 'Agregações'."""
     c1, c2 = st.columns([0.8, 0.2], vertical_alignment="center")
@@ -332,8 +456,8 @@ def display_aggregations_tab(df: pd.DataFrame):
 
             def render_chart(container, chart_type, color_mode, sort_by_chart, sort_order_chart):
                 
-                # A ordenação para pegar o Top 15 e a ordenação para exibição são feitas aqui
-                chart_data = agg_data.sort_values(by='Contagem', ascending=False).head(15).sort_values(
+                # Seleção do Top 15 (sem ordenar todos os grupos) e ordenação para exibição
+                chart_data = agg_data.nlargest(15, 'Contagem').sort_values(
                     by=sort_by_chart,
                     ascending=(sort_order_chart == "Crescente")
                 )
@@ -404,6 +528,18 @@ def display_aggregations_tab(df: pd.DataFrame):
                 render_chart(col_chart, chart_type, color_mode, sort_by_chart, sort_order_chart)
 
 
+@st.cache_data(show_spinner=False, hash_funcs=data_loader.DATAFRAME_HASH_FUNCS)
+def prepare_crosstab_data(
+    df: pd.DataFrame, col1: str, col2: str, selected_vals1: list, selected_vals2: list
+) -> pd.DataFrame:
+    """
+    Calcula a tabela de contingência entre duas variáveis, considerando apenas
+    os valores selecionados de cada uma.
+    """
+    df_crosstab = df[df[col1].isin(selected_vals1) & df[col2].isin(selected_vals2)]
+    return pd.crosstab(df_crosstab[col1], df_crosstab[col2])
+
+@st.fragment
 def display_crosstab_tab(df: pd.DataFrame):
     """
     Exibe a aba de Análise Cruzada, permitindo a comparação entre duas
@@ -413,7 +549,7 @@ def display_crosstab_tab(df: pd.DataFrame):
     st.markdown("Selecione duas variáveis categóricas para analisar a frequência e a relação entre elas.")
 
     # Identifica colunas categóricas com baixa cardinalidade para uma boa visualização
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
     low_cardinality_cols = [col for col in categorical_cols if df[col].nunique() <= 50]
     
     high_cardinality_cols = set(categorical_cols) - set(low_cardinality_cols)
@@ -457,13 +593,11 @@ def display_crosstab_tab(df: pd.DataFrame):
             default=unique_vals2
         )
 
-    df_crosstab = df[df[col1].isin(selected_vals1) & df[col2].isin(selected_vals2)]
-
     st.divider()
 
     try:
         # Calcula a tabela de contingência (crosstab)
-        crosstab_df = pd.crosstab(df_crosstab[col1], df_crosstab[col2])
+        crosstab_df = prepare_crosstab_data(df, col1, col2, selected_vals1, selected_vals2)
 
         # Cria o mapa de calor (heatmap) com Plotly
         fig = px.imshow(
@@ -486,6 +620,34 @@ def display_crosstab_tab(df: pd.DataFrame):
         st.error(f"Ocorreu um erro ao gerar a análise cruzada: {e}")
 
 
+@st.cache_data(show_spinner=False, hash_funcs=data_loader.DATAFRAME_HASH_FUNCS)
+def prepare_timeseries_data(
+    df: pd.DataFrame, date_col: str, resample_code: str, segment_col: str = None
+) -> pd.DataFrame:
+    """
+    Conta os casos únicos por período (e, opcionalmente, por segmento)
+    a partir de uma coluna de data.
+    """
+    # --- Prepara o DataFrame dinamicamente com as colunas necessárias ---
+    cols_to_keep = [date_col, config.KEY_COLUMN_PRINCIPAL]
+    if segment_col is not None:
+        cols_to_keep.append(segment_col)
+
+    # Garante que a lista de colunas seja única para evitar erros
+    unique_cols = list(set(cols_to_keep))
+    df_time = df[unique_cols].dropna(subset=cols_to_keep) # Remove linhas sem data ou segmento
+
+    groupers = [pd.Grouper(key=date_col, freq=resample_code)]
+    if segment_col is not None:
+        groupers.append(segment_col)
+
+    # Usa .agg() para uma saída consistente
+    # observed=True evita combinações vazias quando o segmento é do tipo 'category'
+    return df_time.groupby(groupers, observed=True).agg(
+        Contagem_de_Casos=(config.KEY_COLUMN_PRINCIPAL, 'nunique')
+    ).reset_index().rename(columns={date_col: 'Período'})
+
+@st.fragment
 def display_timeseries_tab(df: pd.DataFrame):
     """
     Exibe a aba de Análise de Série Temporal, permitindo visualizar a
@@ -498,7 +660,7 @@ def display_timeseries_tab(df: pd.DataFrame):
     date_cols = df.select_dtypes(include=['datetime64[ns]', 'datetime']).columns.tolist()
 
     # --- Filtra colunas de segmentação por cardinalidade ---
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
     CARDINALITY_LIMIT = 30 # Mesmo limite da Análise Cruzada para consistência
     
     low_cardinality_cols = [col for col in categorical_cols if df[col].nunique() <= CARDINALITY_LIMIT]
@@ -511,7 +673,7 @@ def display_timeseries_tab(df: pd.DataFrame):
         return
 
     # Identifica colunas categóricas para segmentação
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
     segmentation_options = ["Nenhum (Total Geral)"] + sorted(categorical_cols)
 
     col1_selection, col2_selection, col3_selection = st.columns(3)
@@ -537,36 +699,19 @@ def display_timeseries_tab(df: pd.DataFrame):
         }
         resample_code = granularity_map[granularity]
 
-        # --- Prepara o DataFrame dinamicamente com as colunas necessárias ---
-        cols_to_keep = [date_col, config.KEY_COLUMN_PRINCIPAL]
-        if segment_col != "Nenhum (Total Geral)":
-            cols_to_keep.append(segment_col)
-        
-        # Garante que a lista de colunas seja única para evitar erros
-        unique_cols = list(set(cols_to_keep))
-        df_time = df[unique_cols].copy()
-        df_time = df_time.dropna(subset=cols_to_keep) # Remove linhas sem data ou segmento
-
-        if df_time.empty:
-            st.info("Não há dados válidos na coluna de data selecionada para o período filtrado.")
-            return
-
         if segment_col == "Nenhum (Total Geral)":
-            # Usa .agg() para uma saída consistente
-            time_series_data = df_time.groupby(pd.Grouper(key=date_col, freq=resample_code)).agg(
-                Contagem_de_Casos=(config.KEY_COLUMN_PRINCIPAL, 'nunique')
-            ).reset_index().rename(columns={date_col: 'Período'})
-            y_col = 'Contagem_de_Casos'
+            time_series_data = prepare_timeseries_data(df, date_col, resample_code)
             color_arg = None
             title = f"Evolução de Casos por {granularity} ({date_col})"
         else:
-            # Usa .agg() para uma saída consistente
-            time_series_data = df_time.groupby([pd.Grouper(key=date_col, freq=resample_code), segment_col]).agg(
-                Contagem_de_Casos=(config.KEY_COLUMN_PRINCIPAL, 'nunique')
-            ).reset_index().rename(columns={date_col: 'Período'})
-            y_col = 'Contagem_de_Casos'
+            time_series_data = prepare_timeseries_data(df, date_col, resample_code, segment_col)
             color_arg = segment_col
             title = f"Evolução de Casos por {granularity} ({date_col}), segmentado por {segment_col}"
+        y_col = 'Contagem_de_Casos'
+
+        if time_series_data.empty:
+            st.info("Não há dados válidos na coluna de data selecionada para o período filtrado.")
+            return
 
         # Cria o gráfico de linha com Plotly
         fig = px.line(
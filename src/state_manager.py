@@ -3,11 +3,28 @@
 import streamlit as st
 from . import config
 
+# Prefixos das chaves dos widgets renderizados dentro das abas
+TAB_WIDGET_KEY_PREFIXES = (
+    "multiselect_columns", "view_mode_", "chart_type_", "color_mode_", "sort_chart_", "order_chart_",
+)
+
+# Widgets que podem deixar de ser renderizados: os das abas e os filtros da barra
+# lateral (os secundários só são desenhados quando o usuário pede para exibi-los)
+PERSISTENT_WIDGET_KEY_PREFIXES = TAB_WIDGET_KEY_PREFIXES + ("filter_",)
+
 def initialize_state():
     """Inicializa as variáveis no session_state se ainda não existirem."""
     if 'expanders_state' not in st.session_state:
         st.session_state.expanders_state = True # Inicia expandido
 
+    # A aba ativa é restaurada da URL (?tab=...), permitindo links diretos para cada aba
+    if 'active_tab' not in st.session_state:
+        tab = st.query_params.get('tab')
+        st.session_state.active_tab = tab if tab in config.ABAS_APP else next(iter(config.ABAS_APP))
+
+    # Widgets de abas não exibidas não são renderizados; preserva seus valores
+    persist_tab_widgets_state()
+
     # Define os valores padrão dos filtros no estado da sessão
     # Isso evita conflitos com o parâmetro 'default' dos widgets
     for col, default_value in config.JSON_FILTROS_DEFAULT.items():
@@ -16,14 +33,36 @@ def initialize_state():
             # Garante que o valor seja sempre uma lista para o multiselect
             st.session_state[key] = [default_value] if isinstance(default_value, str) else default_value
     
+def persist_tab_widgets_state():
+    """
+    Preserva o estado dos widgets que vivem dentro das abas e dos filtros.
+
+    O Streamlit descarta o estado de widgets que não são renderizados em um rerun,
+    o que acontece com todas as abas inativas e com os filtros secundários ocultos.
+    Reatribuir o valor mantém a seleção até que o widget volte a ser exibido.
+    """
+    for key in list(st.session_state.keys()):
+        if key.startswith(PERSISTENT_WIDGET_KEY_PREFIXES):
+            st.session_state[key] = st.session_state[key]
+
 def toggle_expanders_state():
     """Inverte o estado booleano de 'expanders_state'."""
     st.session_state.expanders_state = not st.session_state.expanders_state
 
+def sync_active_tab():
+    """Reflete a aba ativa na URL."""
+    st.query_params['tab'] = st.session_state.active_tab
+
 def invalidate_excel_file():
     """Define o arquivo Excel no estado da sessão como None."""
     st.session_state.excel_file = None
 
+def clear_cache():
+    """Descarta os dados em cache do Streamlit, forçando a releitura na próxima execução."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    invalidate_excel_file()
+
 def clear_filters(all_columns: list = None):
     """Limpa todos os filtros da barra lateral, resetando os widgets."""
     # Filtros são identificados por um prefixo para segurança